@@ -1,19 +1,63 @@
-from flask import Flask, request, jsonify, send_file
-from flask_cors import CORS
 import os
 import io
 import uuid
 import zipfile
+import shutil
 import subprocess
-from PyPDF2 import PdfMerger, PdfReader, PdfWriter
-from PIL import Image
 import traceback
 import tempfile
 import json
 import time
+import importlib
+import functools
+import resource
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+# ---------------- Startup Timing ---------------- #
+# Cold starts are user-facing on Cloud Run, so every boot records how long
+# each import and setup step took (emitted as a "startup" log event below).
+_boot_start = time.perf_counter()
+_startup_ms = {}
+
+_t0 = time.perf_counter()
+from flask import Flask, request, jsonify, send_file, g, has_request_context
+_startup_ms["import_flask"] = round((time.perf_counter() - _t0) * 1000, 1)
+
+_t0 = time.perf_counter()
+from flask_cors import CORS
+_startup_ms["import_flask_cors"] = round((time.perf_counter() - _t0) * 1000, 1)
+
+# PyPDF2 and PIL are imported inside the routes that need them so a cold
+# worker can answer /healthz without paying for them. Set LAZY_IMPORTS=0 to
+# import them at boot instead (e.g. with gunicorn --preload, so forked
+# workers share the already-imported modules).
+HEAVY_MODULES = ("PyPDF2", "PIL.Image")
+LAZY_IMPORTS = os.environ.get("LAZY_IMPORTS", "1") != "0"
+
+# WARMUP=1 runs a tiny in-memory PDF through every engine at boot, before
+# the worker starts serving, so the first real request is not the one that
+# pays for module imports and Ghostscript's first run.
+WARMUP = os.environ.get("WARMUP", "0") == "1"
+
+# Every profiled request has its stack sampled every PROFILE_INTERVAL_MS
+# from the start; the samples of requests slower than SLOW_REQUEST_MS are
+# written to PROFILE_DIR and the rest are dropped (0 disables sampling).
+# Only the newest PROFILE_MAX_FILES profiles are kept. On Cloud Run /tmp is
+# in-memory and gone when the instance scales to zero, so point PROFILE_DIR
+# at a mounted volume (e.g. a Cloud Storage volume mount) to keep them.
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 5000))
+PROFILE_INTERVAL_MS = int(os.environ.get("PROFILE_INTERVAL_MS", 10))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 20))
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "pdf-profiles")
+)
+
 # ---------------- Config ---------------- #
+_t0 = time.perf_counter()
 app = Flask(__name__)
 CORS(app, resources={
     r"/*": {
@@ -29,6 +73,7 @@ CORS(app, resources={
 
 # Max upload size = 32 MB
 app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
+_startup_ms["app_init"] = round((time.perf_counter() - _t0) * 1000, 1)
 
 
 # ---------------- Structured Logging ---------------- #
@@ -38,8 +83,10 @@ def log_event(event: str, status: str, **kwargs):
 
     Fields always present:
       - timestamp  : ISO-8601 UTC
-      - event      : operation name  (upload, compress, merge, split, image_to_pdf, download)
+      - event      : operation name  (upload, compress, merge, split, image_to_pdf, download, startup,
+                     request_profile)
       - status     : "success" | "error"
+      - request_id : inside a @profiled route; shared by every line of that request
 
     Optional kwargs (pass whatever is relevant):
       - file_size_kb, page_count, duration_ms, error, filename, file_count, etc.
@@ -50,10 +97,210 @@ def log_event(event: str, status: str, **kwargs):
         "status": status,
         **kwargs,
     }
+    profile = _current_profile()
+    if profile is not None:
+        payload.setdefault("request_id", profile.request_id)
     # Cloud Run captures stdout → Cloud Logging automatically
     print(json.dumps(payload), flush=True)
 
 
+# ---------------- Request Profiling ---------------- #
+class _RequestProfile:
+    """
+    Resource usage of one request, logged by @profiled as a "request_profile"
+    event with the same request_id as the route's own log lines.
+
+    Fields of that event (besides operation and request_id):
+      - phases_ms          : time per phase (save, parse, process, write, respond)
+      - cpu_ms             : CPU time of the request thread
+      - children_cpu_ms    : CPU time of child processes (Ghostscript) reaped
+      - children_max_rss_kb: largest child RSS, only when a child reaped during
+                             this request set a new high (null otherwise)
+      - peak_rss_kb        : worker peak RSS (high-water mark)
+      - rss_growth_kb      : how much this request raised that peak
+      - profile_path       : sampled stacks covering the whole request, saved
+                             only when it took SLOW_REQUEST_MS or longer
+    """
+
+    def __init__(self, event: str):
+        self.event = event
+        self.request_id = uuid.uuid4().hex
+        self.phases = {}
+        self.profile_path = None
+        self._thread_id = threading.get_ident()
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._self_start = resource.getrusage(resource.RUSAGE_SELF)
+        self._children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._done = threading.Event()
+        self._sampler = None
+        if SLOW_REQUEST_MS > 0:
+            self._sampler = threading.Thread(target=self._sample_if_slow, daemon=True)
+            self._sampler.start()
+
+    def _sample_if_slow(self):
+        """
+        Sample the request thread's stack until it finishes, and save the
+        samples only if the request took SLOW_REQUEST_MS or longer.
+
+        Sampling starts with the request so a slow profile also shows the
+        upload and parse time, not just what ran after the threshold.
+        """
+        stacks = Counter()
+        interval = PROFILE_INTERVAL_MS / 1000
+        while not self._done.wait(interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                where = os.path.join(*code.co_filename.split(os.sep)[-2:])
+                names.append(f"{code.co_name} ({where}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                stacks[";".join(reversed(names))] += 1
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        if not stacks or elapsed_ms < SLOW_REQUEST_MS:
+            return
+        # Collapsed-stack format, readable by flamegraph.pl and speedscope.
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(
+            PROFILE_DIR,
+            f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{self.event}_{uuid.uuid4().hex[:8]}.folded",
+        )
+        with open(path, "w") as f_out:
+            for stack, count in stacks.most_common():
+                f_out.write(f"{stack} {count}\n")
+        self.profile_path = path
+        _prune_profiles()
+
+    def emit(self):
+        """Log the finished profile as a "request_profile" event."""
+        log_event("request_profile", "success",
+                  operation=self.event,
+                  request_id=self.request_id,
+                  **self.finish())
+
+    def finish(self) -> dict:
+        self._done.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self_end = resource.getrusage(resource.RUSAGE_SELF)
+        children_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children_cpu = (
+            (children_end.ru_utime - self._children_start.ru_utime)
+            + (children_end.ru_stime - self._children_start.ru_stime)
+        )
+        fields = {
+            "phases_ms": {k: round(v * 1000, 1) for k, v in self.phases.items()},
+            "cpu_ms": round((time.thread_time() - self._cpu_start) * 1000, 1),
+            "children_cpu_ms": round(children_cpu * 1000, 1),
+            # ru_maxrss for children is a lifetime high-water mark, so it
+            # says something about this request only when it went up.
+            "children_max_rss_kb": (
+                children_end.ru_maxrss
+                if children_end.ru_maxrss > self._children_start.ru_maxrss
+                else None
+            ),
+            "peak_rss_kb": self_end.ru_maxrss,
+            "rss_growth_kb": self_end.ru_maxrss - self._self_start.ru_maxrss,
+        }
+        if self.profile_path:
+            fields["profile_path"] = self.profile_path
+        return fields
+
+
+def _prune_profiles():
+    """Delete the oldest saved profiles beyond PROFILE_MAX_FILES."""
+    try:
+        paths = [
+            os.path.join(PROFILE_DIR, name)
+            for name in os.listdir(PROFILE_DIR)
+            if name.endswith(".folded")
+        ]
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:max(0, len(paths) - PROFILE_MAX_FILES)]:
+            os.remove(path)
+    except OSError:
+        # Another worker may be pruning the same directory.
+        pass
+
+
+def _current_profile():
+    if not has_request_context():
+        return None
+    return g.get("profile")
+
+
+def profiled(event: str):
+    """
+    Wrap a route so it logs a "request_profile" event with phase timings and
+    resource usage; `event` is recorded as its operation.
+
+    The route's own log lines are printed as they happen. send_file streams
+    the body after the view returns, so the "respond" phase runs from the
+    view's return until the server closes the response, and the profile is
+    logged only then (never, if the response is never closed).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            profile = _RequestProfile(event)
+            g.profile = profile
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except Exception:
+                profile.emit()
+                raise
+            finally:
+                g.profile = None
+
+            respond_start = time.perf_counter()
+
+            def on_close():
+                profile.phases["respond"] = time.perf_counter() - respond_start
+                profile.emit()
+
+            _call_when_sent(response, on_close)
+            return response
+        return wrapper
+    return decorator
+
+
+def _call_when_sent(response, callback):
+    """
+    Run `callback` once the server has finished sending `response`.
+
+    Werkzeug skips Response.close callbacks for direct-passthrough bodies
+    (send_file), so chain onto the body's own close() instead; that keeps
+    the server's wsgi.file_wrapper / sendfile path intact.
+    """
+    body = response.response
+    if response.direct_passthrough and hasattr(body, "close"):
+        close_body = body.close
+
+        def close():
+            try:
+                close_body()
+            finally:
+                callback()
+
+        body.close = close
+    else:
+        response.call_on_close(callback)
+
+
+@contextmanager
+def profile_phase(name: str):
+    """Add the time spent in the block to the current request's phase timings."""
+    profile = _current_profile()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.phases[name] = profile.phases.get(name, 0.0) + time.perf_counter() - t0
+
+
 # ---------------- Utility ---------------- #
 def get_file_size_kb(path: str) -> float:
     try:
@@ -89,6 +336,7 @@ def internal_error(_error):
 # ---------------- PDF Operations ---------------- #
 
 @app.route("/compress", methods=["POST"])
+@profiled("compress")
 def compress():
     uploaded_file = request.files.get("file")
     if not uploaded_file or not uploaded_file.filename.lower().endswith(".pdf"):
@@ -103,7 +351,8 @@ def compress():
             input_path = os.path.join(tmp_dir, f"{file_id}_input.pdf")
             output_path = os.path.join(tmp_dir, f"{file_id}_compressed.pdf")
 
-            uploaded_file.save(input_path)
+            with profile_phase("save"):
+                uploaded_file.save(input_path)
             input_size_kb = get_file_size_kb(input_path)
 
             log_event("upload", "success",
@@ -121,7 +370,8 @@ def compress():
                 "-dOptimize=true",          # ← optimize
                 f"-sOutputFile={output_path}", input_path
             ]
-            result = subprocess.run(gs_cmd, capture_output=True, text=True)
+            with profile_phase("process"):
+                result = subprocess.run(gs_cmd, capture_output=True, text=True)
 
             if result.returncode != 0 or not os.path.exists(output_path):
                 log_event("compress", "error",
@@ -165,7 +415,10 @@ def compress():
 
 
 @app.route("/merge", methods=["POST"])
+@profiled("merge")
 def merge():
+    from PyPDF2 import PdfMerger, PdfReader
+
     files = request.files.getlist("files")
     if not files:
         return json_error("No files uploaded.", 400)
@@ -181,7 +434,8 @@ def merge():
             for file in files:
                 if file.filename.lower().endswith(".pdf"):
                     tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4()}.pdf")
-                    file.save(tmp_path)
+                    with profile_phase("save"):
+                        file.save(tmp_path)
                     size_kb = get_file_size_kb(tmp_path)
                     total_input_kb += size_kb
                     valid_count += 1
@@ -191,7 +445,8 @@ def merge():
                               filename=file.filename,
                               file_size_kb=size_kb)
 
-                    merger.append(PdfReader(tmp_path))
+                    with profile_phase("parse"):
+                        merger.append(PdfReader(tmp_path))
 
             if valid_count == 0:
                 return json_error("No valid PDF files found.", 400)
@@ -199,8 +454,9 @@ def merge():
             file_id = str(uuid.uuid4())
             output_path = os.path.join(tmp_dir, f"{file_id}_merged.pdf")
 
-            with open(output_path, "wb") as f_out:
-                merger.write(f_out)
+            with profile_phase("write"):
+                with open(output_path, "wb") as f_out:
+                    merger.write(f_out)
             merger.close()
 
             output_size_kb = get_file_size_kb(output_path)
@@ -231,7 +487,10 @@ def merge():
 
 
 @app.route("/split", methods=["POST"])
+@profiled("split")
 def split():
+    from PyPDF2 import PdfReader, PdfWriter
+
     file = request.files.get("file")
     if not file or not file.filename.lower().endswith(".pdf"):
         return json_error("Invalid file. Please upload a PDF.", 400)
@@ -249,7 +508,8 @@ def split():
         with tempfile.TemporaryDirectory() as tmp_dir:
             file_id = str(uuid.uuid4())
             input_path = os.path.join(tmp_dir, f"{file_id}_input.pdf")
-            file.save(input_path)
+            with profile_phase("save"):
+                file.save(input_path)
             input_size_kb = get_file_size_kb(input_path)
 
             log_event("upload", "success",
@@ -257,8 +517,9 @@ def split():
                       filename=original_filename,
                       file_size_kb=input_size_kb)
 
-            reader = PdfReader(input_path)
-            num_pages = len(reader.pages)
+            with profile_phase("parse"):
+                reader = PdfReader(input_path)
+                num_pages = len(reader.pages)
 
             start = max(1, start)
             end = min(end, num_pages)
@@ -266,13 +527,15 @@ def split():
             if start > end:
                 return json_error("Invalid range: start must be ≤ end.", 400)
 
-            writer = PdfWriter()
-            for i in range(start - 1, end):
-                writer.add_page(reader.pages[i])
+            with profile_phase("process"):
+                writer = PdfWriter()
+                for i in range(start - 1, end):
+                    writer.add_page(reader.pages[i])
 
             output_path = os.path.join(tmp_dir, f"{file_id}_split.pdf")
-            with open(output_path, "wb") as f_out:
-                writer.write(f_out)
+            with profile_phase("write"):
+                with open(output_path, "wb") as f_out:
+                    writer.write(f_out)
 
             output_size_kb = get_file_size_kb(output_path)
             duration_ms = round((time.monotonic() - start_time) * 1000)
@@ -308,7 +571,10 @@ def split():
 
 
 @app.route("/image", methods=["POST"])
+@profiled("image_to_pdf")
 def image_to_pdf():
+    from PIL import Image
+
     files = request.files.getlist("file")
     images = []
     start_time = time.monotonic()
@@ -321,7 +587,8 @@ def image_to_pdf():
                 name = file.filename.lower()
                 if name.endswith((".png", ".jpg", ".jpeg")):
                     tmp_img_path = os.path.join(tmp_dir, f"{uuid.uuid4()}_{file.filename}")
-                    file.save(tmp_img_path)
+                    with profile_phase("save"):
+                        file.save(tmp_img_path)
                     size_kb = get_file_size_kb(tmp_img_path)
                     total_input_kb += size_kb
                     valid_count += 1
@@ -331,7 +598,8 @@ def image_to_pdf():
                               filename=file.filename,
                               file_size_kb=size_kb)
 
-                    img = Image.open(tmp_img_path).convert("RGB")
+                    with profile_phase("parse"):
+                        img = Image.open(tmp_img_path).convert("RGB")
                     images.append(img)
 
             if not images:
@@ -339,7 +607,8 @@ def image_to_pdf():
 
             file_id = str(uuid.uuid4())
             output_path = os.path.join(tmp_dir, f"{file_id}_image2pdf.pdf")
-            images[0].save(output_path, format="PDF", save_all=True, append_images=images[1:])
+            with profile_phase("write"):
+                images[0].save(output_path, format="PDF", save_all=True, append_images=images[1:])
 
             output_size_kb = get_file_size_kb(output_path)
             duration_ms = round((time.monotonic() - start_time) * 1000)
@@ -380,27 +649,44 @@ def image_to_pdf():
 # ---------------- Rotate PDF ---------------- #
 
 @app.route("/rotate", methods=["POST"])
+@profiled("rotate")
 def rotate():
     """
     Rotate pages in a PDF.
 
     Form fields:
       file    — one PDF file (required)
-      angle   — 90 | 180 | 270  (required)
+      angle   — 90 | 180 | 270  (required unless "angles" is given)
       pages   — "all"  OR  "1,3,5"  OR  "1-5,8,10-12"  (default: "all")
                 Page numbers are 1-based.
+      angles  — optional per-page map as JSON, e.g. {"1": 90, "3": 270}.
+                Overrides "angle" and "pages" when present.
+      mode    — "incremental" (default) | "full"
+                Incremental appends only the changed page objects to the
+                original bytes; it falls back to a full rewrite for files it
+                cannot safely update (encrypted, xref streams, repaired xref).
     """
+    from PyPDF2 import PdfReader, PdfWriter
+
     file = request.files.get("file")
     if not file or not file.filename.lower().endswith(".pdf"):
         return json_error("Invalid file. Please upload a PDF.", 400)
 
-    # Validate angle
-    try:
-        angle = int(request.form.get("angle", 90))
-        if angle not in (90, 180, 270):
-            raise ValueError
-    except (ValueError, TypeError):
-        return json_error("Invalid angle. Must be 90, 180, or 270.", 400)
+    angles_param = request.form.get("angles", "").strip()
+
+    # Validate angle (not needed when a per-page map is given)
+    angle = None
+    if not angles_param:
+        try:
+            angle = int(request.form.get("angle", 90))
+            if angle not in (90, 180, 270):
+                raise ValueError
+        except (ValueError, TypeError):
+            return json_error("Invalid angle. Must be 90, 180, or 270.", 400)
+
+    save_mode = request.form.get("mode", "incremental").strip().lower()
+    if save_mode not in ("incremental", "full"):
+        return json_error("Invalid mode. Must be 'incremental' or 'full'.", 400)
 
     pages_param    = request.form.get("pages", "all").strip()
     original_filename = file.filename
@@ -410,7 +696,8 @@ def rotate():
         with tempfile.TemporaryDirectory() as tmp_dir:
             file_id    = str(uuid.uuid4())
             input_path = os.path.join(tmp_dir, f"{file_id}_input.pdf")
-            file.save(input_path)
+            with profile_phase("save"):
+                file.save(input_path)
             input_size_kb = get_file_size_kb(input_path)
 
             log_event("upload", "success",
@@ -418,24 +705,44 @@ def rotate():
                       filename=original_filename,
                       file_size_kb=input_size_kb)
 
-            reader     = PdfReader(input_path)
-            num_pages  = len(reader.pages)
-            writer     = PdfWriter()
+            with profile_phase("parse"):
+                reader     = PdfReader(input_path)
+                num_pages  = len(reader.pages)
 
-            # Parse which pages to rotate
+            # Map of 0-based page index → clockwise angle to apply
             try:
-                rotate_indices = set(_parse_page_list(pages_param, num_pages))
+                if angles_param:
+                    page_angles = _parse_angle_map(angles_param, num_pages)
+                else:
+                    page_angles = {
+                        i: angle for i in _parse_page_list(pages_param, num_pages)
+                    }
             except ValueError as ve:
                 return json_error(str(ve), 400)
 
-            for i, page in enumerate(reader.pages):
-                if i in rotate_indices:
-                    page.rotate(angle)
-                writer.add_page(page)
-
             output_path = os.path.join(tmp_dir, f"{file_id}_rotated.pdf")
-            with open(output_path, "wb") as f_out:
-                writer.write(f_out)
+
+            bytes_written = None
+            if save_mode == "incremental":
+                with profile_phase("write"):
+                    bytes_written = _write_incremental_rotation(
+                        reader, input_path, output_path, page_angles
+                    )
+                if bytes_written is None:
+                    save_mode = "full"
+
+            if save_mode == "full":
+                with profile_phase("process"):
+                    writer = PdfWriter()
+                    for i, page in enumerate(reader.pages):
+                        if i in page_angles:
+                            page.rotate(page_angles[i])
+                        writer.add_page(page)
+
+                with profile_phase("write"):
+                    with open(output_path, "wb") as f_out:
+                        writer.write(f_out)
+                bytes_written = os.path.getsize(output_path)
 
             output_size_kb = get_file_size_kb(output_path)
             duration_ms    = round((time.monotonic() - start_time) * 1000)
@@ -443,8 +750,11 @@ def rotate():
             log_event("rotate", "success",
                       filename=original_filename,
                       total_pages=num_pages,
-                      pages_rotated=len(rotate_indices),
+                      pages_rotated=len(page_angles),
                       angle=angle,
+                      angles=sorted(set(page_angles.values())),
+                      save_mode=save_mode,
+                      bytes_written=bytes_written,
                       input_size_kb=input_size_kb,
                       output_size_kb=output_size_kb,
                       duration_ms=duration_ms)
@@ -469,9 +779,149 @@ def rotate():
         return json_error("Rotation failed due to a server error.", 500)
 
 
+def _parse_angle_map(raw: str, total_pages: int) -> dict:
+    """
+    Convert a JSON per-page angle map into {0-based page index: angle}.
+
+    Accepts an object keyed by 1-based page number, e.g. {"1": 90, "3": 270}.
+    Angles may be any multiple of 90 (including negative ones) and are
+    normalised to 0–270; pages that come out at 0 are left unchanged.
+
+    Raises ValueError with a descriptive message on bad input.
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        raise ValueError("Invalid angles. Expected a JSON object like {\"1\": 90}.")
+    if not isinstance(data, dict) or not data:
+        raise ValueError("Invalid angles. Expected a JSON object like {\"1\": 90}.")
+
+    page_angles = {}
+    for key, value in data.items():
+        try:
+            n = int(key)
+        except (ValueError, TypeError):
+            raise ValueError(f"'{key}' is not a valid page number.")
+        if n < 1 or n > total_pages:
+            raise ValueError(
+                f"Page {n} is out of bounds "
+                f"(document has {total_pages} pages)."
+            )
+        if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                or value % 90 != 0:
+            raise ValueError(
+                f"Invalid angle for page {n}. Must be a multiple of 90."
+            )
+        angle = int(value) % 360
+        if angle:
+            page_angles[n - 1] = angle
+
+    return page_angles
+
+
+def _write_incremental_rotation(reader, input_path: str, output_path: str,
+                                page_angles: dict):
+    """
+    Save a rotation as a PDF incremental update.
+
+    The original bytes are copied through unchanged and only the modified page
+    dictionaries, a new xref section and a trailer pointing back at the
+    previous xref (/Prev) are appended, so the cost scales with the number of
+    rotated pages rather than the size of the document.
+
+    Returns the number of bytes appended, or None when the file cannot be
+    updated this way and the caller should fall back to a full rewrite.
+    """
+    from PyPDF2.generic import DictionaryObject, NameObject, NumberObject
+
+    if reader.is_encrypted or reader.xref_index:
+        return None
+
+    input_size = os.path.getsize(input_path)
+    with open(input_path, "rb") as f_in:
+        # Locate the last cross-reference section via the trailing startxref.
+        f_in.seek(max(0, input_size - 2048))
+        tail = f_in.read()
+        tail_pos = tail.rfind(b"startxref")
+        if tail_pos == -1:
+            return None
+        try:
+            prev_xref = int(tail[tail_pos + 9:].split()[0])
+        except (ValueError, IndexError):
+            return None
+        # Only classic xref tables; files using xref streams would need a
+        # cross-reference stream in the update as well.
+        f_in.seek(prev_xref)
+        if f_in.read(4) != b"xref":
+            return None
+
+    # Check every page before touching any: the full-rewrite fallback
+    # reuses these cached page objects and would rotate them twice.
+    if any(reader.pages[i].indirect_reference is None for i in page_angles):
+        return None
+
+    updates = {}
+    for i, angle in page_angles.items():
+        page = reader.pages[i]
+        ref = page.indirect_reference
+        page.rotate(angle)
+        current = page.get("/Rotate", 0)
+        if not isinstance(current, int):
+            current = current.get_object()
+        page[NameObject("/Rotate")] = NumberObject(int(current) % 360)
+        updates[ref.idnum] = (ref.generation, page)
+
+    # Offsets below are input_size + position in body, so a separator
+    # written into body is already counted once.
+    body = io.BytesIO()
+    if not tail.endswith((b"\n", b"\r")):
+        body.write(b"\n")
+    base = input_size
+
+    offsets = {}
+    for idnum in sorted(updates):
+        generation, page = updates[idnum]
+        offsets[idnum] = base + body.tell()
+        body.write(f"{idnum} {generation} obj\n".encode("ascii"))
+        # Write a plain dictionary so only the /Page entries are serialized.
+        DictionaryObject(page).write_to_stream(body, None)
+        body.write(b"\nendobj\n")
+
+    xref_pos = base + body.tell()
+    # Repeat the free-list head so the section stays zero-indexed; some
+    # readers (PyPDF2 included) otherwise treat it as a broken table.
+    body.write(b"xref\n0 1\n0000000000 65535 f\r\n")
+    ids = sorted(offsets)
+    run_start = 0
+    for k in range(1, len(ids) + 1):
+        # Group consecutive object numbers into one subsection.
+        if k == len(ids) or ids[k] != ids[k - 1] + 1:
+            body.write(f"{ids[run_start]} {k - run_start}\n".encode("ascii"))
+            for idnum in ids[run_start:k]:
+                generation = updates[idnum][0]
+                body.write(f"{offsets[idnum]:010d} {generation:05d} n\r\n".encode("ascii"))
+            run_start = k
+
+    trailer = DictionaryObject()
+    for key, value in reader.trailer.items():
+        if key not in ("/Prev", "/XRefStm"):
+            trailer[NameObject(key)] = value
+    trailer[NameObject("/Prev")] = NumberObject(prev_xref)
+    body.write(b"trailer\n")
+    trailer.write_to_stream(body, None)
+    body.write(f"\nstartxref\n{xref_pos}\n%%EOF\n".encode("ascii"))
+
+    shutil.copyfile(input_path, output_path)
+    with open(output_path, "ab") as f_out:
+        f_out.write(body.getvalue())
+
+    return body.tell()
+
+
 # ---------------- Delete PDF Pages ---------------- #
 
 @app.route("/delete", methods=["POST"])
+@profiled("delete_pages")
 def delete_pages():
     """
     Delete specific pages from a PDF.
@@ -481,6 +931,8 @@ def delete_pages():
       pages   — "1,3,5"  OR  "1-5,8,10-12"  (required)
                 Page numbers are 1-based.
     """
+    from PyPDF2 import PdfReader, PdfWriter
+
     file = request.files.get("file")
     if not file or not file.filename.lower().endswith(".pdf"):
         return json_error("Invalid file. Please upload a PDF.", 400)
@@ -496,7 +948,8 @@ def delete_pages():
         with tempfile.TemporaryDirectory() as tmp_dir:
             file_id    = str(uuid.uuid4())
             input_path = os.path.join(tmp_dir, f"{file_id}_input.pdf")
-            file.save(input_path)
+            with profile_phase("save"):
+                file.save(input_path)
             input_size_kb = get_file_size_kb(input_path)
 
             log_event("upload", "success",
@@ -504,8 +957,9 @@ def delete_pages():
                       filename=original_filename,
                       file_size_kb=input_size_kb)
 
-            reader    = PdfReader(input_path)
-            num_pages = len(reader.pages)
+            with profile_phase("parse"):
+                reader    = PdfReader(input_path)
+                num_pages = len(reader.pages)
 
             # Parse pages to DELETE
             try:
@@ -519,13 +973,15 @@ def delete_pages():
                     "Cannot delete all pages — at least one page must remain.", 400
                 )
 
-            writer = PdfWriter()
-            for i in keep_indices:
-                writer.add_page(reader.pages[i])
+            with profile_phase("process"):
+                writer = PdfWriter()
+                for i in keep_indices:
+                    writer.add_page(reader.pages[i])
 
             output_path = os.path.join(tmp_dir, f"{file_id}_deleted.pdf")
-            with open(output_path, "wb") as f_out:
-                writer.write(f_out)
+            with profile_phase("write"):
+                with open(output_path, "wb") as f_out:
+                    writer.write(f_out)
 
             output_size_kb = get_file_size_kb(output_path)
             duration_ms    = round((time.monotonic() - start_time) * 1000)
@@ -561,17 +1017,39 @@ def delete_pages():
 
 # ---------------- PDF to JPG ---------------- #
 
+# format → (Ghostscript colour device, Ghostscript grayscale device, extension)
+# WebP has no Ghostscript device, so it is rendered as PNG and re-encoded.
+RASTER_FORMATS = {
+    "jpg":  ("jpeg",   "jpeggray", "jpg"),
+    "png":  ("png16m", "pnggray",  "png"),
+    "webp": ("png16m", "pnggray",  "webp"),
+}
+MAX_RASTER_PX = 4000
+
+
 @app.route("/pdf-to-jpg", methods=["POST"])
+@profiled("pdf_to_jpg")
 def pdf_to_jpg():
     """
-    Convert PDF pages to JPG images, returned as a ZIP archive.
+    Convert PDF pages to images (JPG by default), returned as a ZIP archive.
 
     Form fields:
-      file    — one PDF file (required)
-      pages   — "all"  OR  "1,3,5"  OR  "1-5,8"  (default: "all")
-                Page numbers are 1-based.
-      dpi     — output resolution, default 150 (max 300)
+      file      — one PDF file (required)
+      pages     — "all"  OR  "1,3,5"  OR  "1-5,8"  (default: "all")
+                  Page numbers are 1-based.
+      dpi       — output resolution, default 150 (max 300)
+      width     — target width in pixels (max 4000); overrides dpi
+      height    — target height in pixels (max 4000); overrides dpi
+                  With both, each page is scaled to fit inside the box.
+                  The resolution is worked out per page from its MediaBox.
+      format    — "jpg" (default) | "png" | "webp"
+      quality   — 1–100 for jpg/webp (default: encoder default); ignored for png
+      grayscale — "1" / "true" to render in grayscale
+      text_antialias, graphics_antialias
+                — 1 (off) | 2 | 4 (best), Ghostscript alpha bits
     """
+    from PyPDF2 import PdfReader
+
     file = request.files.get("file")
     if not file or not file.filename.lower().endswith(".pdf"):
         return json_error("Invalid file. Please upload a PDF.", 400)
@@ -584,6 +1062,27 @@ def pdf_to_jpg():
     except (ValueError, TypeError):
         dpi = 150
 
+    image_format = request.form.get("format", "jpg").strip().lower()
+    if image_format == "jpeg":
+        image_format = "jpg"
+    if image_format not in RASTER_FORMATS:
+        return json_error("Invalid format. Must be jpg, png, or webp.", 400)
+
+    try:
+        target_width  = _parse_form_int("width", 1, MAX_RASTER_PX)
+        target_height = _parse_form_int("height", 1, MAX_RASTER_PX)
+        quality       = _parse_form_int("quality", 1, 100)
+        text_alpha    = _parse_form_int("text_antialias", 1, 4)
+        graphics_alpha = _parse_form_int("graphics_antialias", 1, 4)
+        if 3 in (text_alpha, graphics_alpha):
+            raise ValueError("Anti-aliasing must be 1, 2, or 4.")
+    except ValueError as ve:
+        return json_error(str(ve), 400)
+
+    grayscale = request.form.get("grayscale", "").strip().lower() in ("1", "true", "yes")
+    color_device, gray_device, extension = RASTER_FORMATS[image_format]
+    device = gray_device if grayscale else color_device
+
     original_filename = file.filename
     base_name         = os.path.splitext(original_filename)[0]
     start_time        = time.monotonic()
@@ -592,7 +1091,8 @@ def pdf_to_jpg():
         with tempfile.TemporaryDirectory() as tmp_dir:
             file_id    = str(uuid.uuid4())
             input_path = os.path.join(tmp_dir, f"{file_id}_input.pdf")
-            file.save(input_path)
+            with profile_phase("save"):
+                file.save(input_path)
             input_size_kb = get_file_size_kb(input_path)
 
             log_event("upload", "success",
@@ -601,8 +1101,9 @@ def pdf_to_jpg():
                       file_size_kb=input_size_kb)
 
             # Determine how many pages the PDF has using PyPDF2
-            reader    = PdfReader(input_path)
-            num_pages = len(reader.pages)
+            with profile_phase("parse"):
+                reader    = PdfReader(input_path)
+                num_pages = len(reader.pages)
 
             # Parse which pages to export
             try:
@@ -610,26 +1111,60 @@ def pdf_to_jpg():
             except ValueError as ve:
                 return json_error(str(ve), 400)
 
+            gs_options = []
+            if quality is not None and image_format == "jpg":
+                gs_options.append(f"-dJPEGQ={quality}")
+            if text_alpha is not None:
+                gs_options.append(f"-dTextAlphaBits={text_alpha}")
+            if graphics_alpha is not None:
+                gs_options.append(f"-dGraphicsAlphaBits={graphics_alpha}")
+
             # Convert requested pages with Ghostscript (one page at a time)
             # Using Ghostscript avoids needing poppler and keeps the container lean.
-            jpg_paths = []
+            image_paths = []
+            page_stats  = []
             for idx in export_indices:
                 page_num    = idx + 1   # 1-based for GS
-                jpg_path    = os.path.join(tmp_dir, f"page_{page_num:04d}.jpg")
+                render_ext  = "png" if image_format == "webp" else extension
+                render_path = os.path.join(tmp_dir, f"page_{page_num:04d}.{render_ext}")
+
+                size_options = []
+                page_size = None
+                if target_width or target_height:
+                    try:
+                        page_dpi, page_width_px, page_height_px = _resolution_for_target(
+                            reader.pages[idx], target_width, target_height
+                        )
+                    except ValueError as ve:
+                        return json_error(f"Page {page_num}: {ve}", 400)
+                    # Fix the raster size in pixels and fit the page into it,
+                    # so the output size doesn't depend on Ghostscript's
+                    # rounding of MediaBox × resolution.
+                    page_size = f"{page_width_px}x{page_height_px}"
+                    size_options = [
+                        f"-g{page_size}",
+                        "-dFIXEDMEDIA", "-dPDFFitPage",
+                    ]
+                else:
+                    page_dpi = dpi
 
                 gs_cmd = [
                     "gs",
                     "-dNOPAUSE", "-dBATCH", "-dQUIET",
-                    "-sDEVICE=jpeg",
-                    f"-r{dpi}",
+                    f"-sDEVICE={device}",
+                    f"-r{page_dpi}",
+                    *size_options,
+                    *gs_options,
                     f"-dFirstPage={page_num}",
                     f"-dLastPage={page_num}",
-                    f"-sOutputFile={jpg_path}",
+                    f"-sOutputFile={render_path}",
                     input_path,
                 ]
-                result = subprocess.run(gs_cmd, capture_output=True, text=True)
+                render_start = time.monotonic()
+                with profile_phase("process"):
+                    result = subprocess.run(gs_cmd, capture_output=True, text=True)
 
-                if result.returncode != 0 or not os.path.exists(jpg_path):
+                if result.returncode != 0 or not os.path.exists(render_path):
                     log_event("pdf_to_jpg", "error",
                               filename=original_filename,
                               page=page_num,
@@ -639,34 +1174,60 @@ def pdf_to_jpg():
                         f"Failed to convert page {page_num}.", 500
                     )
 
-                jpg_paths.append((page_num, jpg_path))
-
-            # Pack all JPGs into a ZIP in memory
+                image_path = render_path
+                if image_format == "webp":
+                    from PIL import Image
+
+                    image_path = os.path.join(tmp_dir, f"page_{page_num:04d}.webp")
+                    with profile_phase("process"):
+                        with Image.open(render_path) as img:
+                            webp_options = {} if quality is None else {"quality": quality}
+                            img.save(image_path, format="WEBP", **webp_options)
+
+                image_paths.append((page_num, image_path))
+                page_stats.append({
+                    "page": page_num,
+                    "dpi": page_dpi,
+                    "size_px": page_size,
+                    "bytes": os.path.getsize(image_path),
+                    "render_ms": round((time.monotonic() - render_start) * 1000),
+                })
+
+            # Pack all images into a ZIP in memory. They are already
+            # compressed, so store them rather than deflating again.
             zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                for page_num, jpg_path in jpg_paths:
-                    arcname = f"{base_name}_page_{page_num:04d}.jpg"
-                    zf.write(jpg_path, arcname=arcname)
+            with profile_phase("write"):
+                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zf:
+                    for page_num, image_path in image_paths:
+                        arcname = f"{base_name}_page_{page_num:04d}.{extension}"
+                        zf.write(image_path, arcname=arcname)
             zip_buffer.seek(0)
 
-            total_jpg_kb = sum(
-                get_file_size_kb(p) for _, p in jpg_paths
+            total_image_kb = sum(
+                get_file_size_kb(p) for _, p in image_paths
             )
             duration_ms = round((time.monotonic() - start_time) * 1000)
 
             log_event("pdf_to_jpg", "success",
                       filename=original_filename,
                       total_pages=num_pages,
-                      pages_exported=len(jpg_paths),
-                      dpi=dpi,
+                      pages_exported=len(image_paths),
+                      # With a target size the resolution is per page (page_stats).
+                      dpi=None if target_width or target_height else dpi,
+                      target_width=target_width,
+                      target_height=target_height,
+                      format=image_format,
+                      quality=None if image_format == "png" else quality,
+                      grayscale=grayscale,
                       input_size_kb=input_size_kb,
-                      total_jpg_size_kb=round(total_jpg_kb, 2),
+                      total_jpg_size_kb=round(total_image_kb, 2),
+                      page_stats=page_stats,
                       duration_ms=duration_ms)
 
             log_event("download", "success",
                       operation="pdf_to_jpg",
                       filename=original_filename,
-                      pages_exported=len(jpg_paths))
+                      pages_exported=len(image_paths))
 
             return send_file(
                 zip_buffer,
@@ -683,6 +1244,56 @@ def pdf_to_jpg():
         return json_error("PDF to JPG failed due to a server error.", 500)
 
 
+def _parse_form_int(name: str, low: int, high: int):
+    """
+    Read an optional integer form field, checking it lies in [low, high].
+
+    Returns None when the field is absent or empty.
+    Raises ValueError with a descriptive message on bad input.
+    """
+    raw = request.form.get(name, "").strip()
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"'{raw}' is not a valid value for {name}.")
+    if value < low or value > high:
+        raise ValueError(f"{name} must be between {low} and {high}.")
+    return value
+
+
+def _resolution_for_target(page, target_width, target_height) -> tuple:
+    """
+    Resolution (dpi) and pixel size that render `page` at the requested size.
+
+    Returns (dpi, width_px, height_px). Ghostscript rasterizes the MediaBox
+    and honours /Rotate, so the box is swapped for pages turned by 90 or 270
+    degrees. When both dimensions are given the smaller resolution wins,
+    keeping the aspect ratio.
+
+    Raises ValueError for a page with an empty MediaBox.
+    """
+    width_pt  = abs(float(page.mediabox.width))
+    height_pt = abs(float(page.mediabox.height))
+    if width_pt == 0 or height_pt == 0:
+        raise ValueError("page has an empty MediaBox and cannot be sized.")
+    if page.rotation % 180 == 90:
+        width_pt, height_pt = height_pt, width_pt
+
+    # Never let the unconstrained side grow past MAX_RASTER_PX either.
+    candidates = [MAX_RASTER_PX * 72 / max(width_pt, height_pt)]
+    if target_width:
+        candidates.append(target_width * 72 / width_pt)
+    if target_height:
+        candidates.append(target_height * 72 / height_pt)
+    resolution = min(candidates)
+
+    width_px  = max(1, round(width_pt * resolution / 72))
+    height_px = max(1, round(height_pt * resolution / 72))
+    return round(resolution, 4), width_px, height_px
+
+
 # ---- shared page-list parser used by rotate, delete, pdf-to-jpg ---- #
 
 def _parse_page_list(raw: str, total_pages: int) -> list:
@@ -736,7 +1347,99 @@ def _parse_page_list(raw: str, total_pages: int) -> list:
 # ---------------- Health Check ---------------- #
 @app.route("/healthz")
 def healthz():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "warmed_up": _warmed_up})
+
+
+# ---------------- Startup ---------------- #
+
+def _import_heavy_modules():
+    """Import the PDF/image libraries now, recording how long each took."""
+    for name in HEAVY_MODULES:
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        _startup_ms[f"import_{name}"] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _warm_up():
+    """
+    Run a tiny in-memory PDF through every engine the routes use.
+
+    Covers PyPDF2 (read/write), PIL (image → PDF and the WebP encoder) and
+    every Ghostscript device (pdfwrite for /compress, the RASTER_FORMATS
+    devices for /pdf-to-jpg), so their first-run costs land at boot instead
+    of on the first user request.
+
+    Returns a dict of error fields for the startup event, empty on success.
+    Failures never stop the worker from starting.
+    """
+    try:
+        _import_heavy_modules()
+
+        from PyPDF2 import PdfReader, PdfWriter
+        from PIL import Image
+
+        t0 = time.perf_counter()
+        writer = PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        pdf_buffer = io.BytesIO()
+        writer.write(pdf_buffer)
+        reader = PdfReader(io.BytesIO(pdf_buffer.getvalue()))
+        reader.pages[0].rotate(90)
+        _startup_ms["warmup_pypdf2"] = round((time.perf_counter() - t0) * 1000, 1)
+
+        t0 = time.perf_counter()
+        with Image.new("RGB", (8, 8), "white") as img:
+            img.save(io.BytesIO(), format="PDF")
+        _startup_ms["warmup_pil"] = round((time.perf_counter() - t0) * 1000, 1)
+
+        t0 = time.perf_counter()
+        with Image.new("RGB", (8, 8), "white") as img:
+            img.save(io.BytesIO(), format="WEBP")
+        _startup_ms["warmup_pil_webp"] = round((time.perf_counter() - t0) * 1000, 1)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "warmup.pdf")
+            with open(input_path, "wb") as f_out:
+                f_out.write(pdf_buffer.getvalue())
+
+            raster_devices = sorted({
+                device
+                for color_device, gray_device, _ in RASTER_FORMATS.values()
+                for device in (color_device, gray_device)
+            })
+            for device in ["pdfwrite", *raster_devices]:
+                t0 = time.perf_counter()
+                subprocess.run([
+                    "gs", f"-sDEVICE={device}",
+                    "-dNOPAUSE", "-dQUIET", "-dBATCH",
+                    f"-sOutputFile={os.path.join(tmp_dir, f'warmup_{device}.out')}",
+                    input_path,
+                ], capture_output=True, timeout=60, check=True)
+                _startup_ms[f"warmup_gs_{device}"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    except Exception as e:
+        return {"error": f"Warm-up failed: {e}",
+                "traceback": traceback.format_exc()[:500]}
+
+    return {}
+
+
+_warmup_error = {}
+if WARMUP:
+    _warmup_error = _warm_up()
+elif not LAZY_IMPORTS:
+    _import_heavy_modules()
+_warmed_up = WARMUP and not _warmup_error
+
+# One startup event per boot; a failed warm-up makes it an "error".
+log_event("startup", "error" if _warmup_error else "success",
+          pid=os.getpid(),
+          lazy_imports=LAZY_IMPORTS,
+          warmup=WARMUP,
+          warmed_up=_warmed_up,
+          timings_ms=_startup_ms,
+          total_ms=round((time.perf_counter() - _boot_start) * 1000, 1),
+          **_warmup_error)
 
 
 if __name__ == '__main__':
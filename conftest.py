@@ -0,0 +1 @@
+# Lets tests/ import app.py when pytest is run from the repo root.
@@ -0,0 +1,144 @@
+import io
+import json
+import subprocess
+import zipfile
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import app as app_module
+
+
+def blank_page(width, height, rotate=0):
+    page = PdfWriter().add_blank_page(width=width, height=height)
+    if rotate:
+        page.rotate(rotate)
+    return page
+
+
+def test_target_width_sets_exact_pixel_size():
+    assert app_module._resolution_for_target(blank_page(612, 792), 1080, None) == (127.0588, 1080, 1398)
+
+
+def test_both_targets_fit_inside_box():
+    _, width_px, height_px = app_module._resolution_for_target(blank_page(612, 792), 1080, 1080)
+    assert (width_px, height_px) == (835, 1080)
+
+
+def test_rotated_page_swaps_mediabox():
+    _, width_px, height_px = app_module._resolution_for_target(blank_page(612, 792, rotate=90), 1080, None)
+    assert (width_px, height_px) == (1080, 835)
+
+
+def test_long_side_is_capped():
+    _, width_px, height_px = app_module._resolution_for_target(blank_page(10, 1000), 4000, None)
+    assert height_px == app_module.MAX_RASTER_PX
+    assert width_px == 40
+
+
+def test_empty_mediabox_is_rejected():
+    with pytest.raises(ValueError):
+        app_module._resolution_for_target(blank_page(0, 792), 1080, None)
+
+
+def test_empty_mediabox_returns_page_error():
+    writer = PdfWriter()
+    writer.add_blank_page(width=0, height=792)
+    pdf = io.BytesIO()
+    writer.write(pdf)
+
+    response = app_module.app.test_client().post(
+        "/pdf-to-jpg",
+        data={"file": (io.BytesIO(pdf.getvalue()), "in.pdf"), "width": "1080"},
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Page 1:")
+
+
+def sample_pdf():
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def fake_gs(monkeypatch):
+    """Stand in for Ghostscript: write a small image to -sOutputFile."""
+    from PIL import Image
+
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        options = dict(arg[2:].split("=", 1) for arg in cmd if arg.startswith("-s") and "=" in arg)
+        mode = "L" if "gray" in options["DEVICE"] else "RGB"
+        image_format = "JPEG" if options["DEVICE"].startswith("jpeg") else "PNG"
+        Image.new(mode, (10, 13), "white").save(options["OutputFile"], format=image_format)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(app_module.subprocess, "run", run)
+    return calls
+
+
+def convert(**form):
+    response = app_module.app.test_client().post(
+        "/pdf-to-jpg", data={"file": (io.BytesIO(sample_pdf()), "in.pdf"), **form}
+    )
+    response.get_data()  # buffer the body before close() releases it
+    response.close()
+    return response
+
+
+def success_event(capsys):
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    return [e for e in lines if e["event"] == "pdf_to_jpg" and e["status"] == "success"][0]
+
+
+@pytest.mark.parametrize("form", [
+    {"format": "gif"},
+    {"quality": "0"},
+    {"quality": "101"},
+    {"text_antialias": "3"},
+    {"width": "4001"},
+    {"height": "tall"},
+])
+def test_invalid_options_return_400(form, fake_gs):
+    assert convert(**form).status_code == 400
+    assert fake_gs == []
+
+
+def test_jpeg_is_an_alias_for_jpg(fake_gs):
+    response = convert(format="jpeg")
+
+    assert response.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(response.data)).namelist() == ["in_page_0001.jpg"]
+    assert "-sDEVICE=jpeg" in fake_gs[0]
+
+
+def test_target_size_logs_per_page_dpi_only(fake_gs, capsys):
+    assert convert(width="1080").status_code == 200
+
+    assert "-g1080x1398" in fake_gs[0]
+    event = success_event(capsys)
+    assert event["dpi"] is None
+    assert event["page_stats"][0]["size_px"] == "1080x1398"
+
+
+def test_png_does_not_log_quality(fake_gs, capsys):
+    assert convert(format="png", quality="60", grayscale="1").status_code == 200
+
+    assert "-sDEVICE=pnggray" in fake_gs[0]
+    assert not any(arg.startswith("-dJPEGQ") for arg in fake_gs[0])
+    event = success_event(capsys)
+    assert event["quality"] is None
+    assert event["dpi"] == 150
+
+
+def test_webp_is_reencoded_with_quality(fake_gs, capsys):
+    response = convert(format="webp", quality="60")
+
+    assert response.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(response.data)).namelist() == ["in_page_0001.webp"]
+    assert success_event(capsys)["quality"] == 60
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import app as app_module
+
+
+def blank_pdf(num_pages):
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(width=612, height=792)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def events(captured, name):
+    lines = [json.loads(line) for line in captured.splitlines() if line.startswith("{")]
+    return [line for line in lines if line["event"] == name]
+
+
+def split(pdf_bytes, end):
+    return app_module.app.test_client().post("/split", data={
+        "file": (io.BytesIO(pdf_bytes), "in.pdf"), "start": "1", "end": str(end),
+    })
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_profile_logged_after_close(capsys, profile_dir):
+    response = split(blank_pdf(3), 2)
+
+    before = capsys.readouterr().out
+    [split_event] = events(before, "split")
+    assert split_event["status"] == "success"
+    assert events(before, "request_profile") == []
+
+    response.close()
+
+    [profile] = events(capsys.readouterr().out, "request_profile")
+    assert profile["operation"] == "split"
+    assert profile["request_id"] == split_event["request_id"]
+    assert set(profile["phases_ms"]) == {"save", "parse", "process", "write", "respond"}
+    assert profile["cpu_ms"] >= 0
+    assert profile["peak_rss_kb"] > 0
+    assert "profile_path" not in profile
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_slow_request_saves_profile(capsys, profile_dir, monkeypatch):
+    monkeypatch.setattr(app_module, "SLOW_REQUEST_MS", 1)
+    monkeypatch.setattr(app_module, "PROFILE_INTERVAL_MS", 1)
+
+    split(blank_pdf(300), 300).close()
+
+    [profile] = events(capsys.readouterr().out, "request_profile")
+    path = profile["profile_path"]
+    assert path.startswith(str(profile_dir))
+    with open(path) as f_in:
+        stacks = f_in.read()
+    # Collapsed stacks include the route itself.
+    assert "split (" in stacks
+
+
+def test_profile_files_are_pruned(capsys, profile_dir, monkeypatch):
+    monkeypatch.setattr(app_module, "SLOW_REQUEST_MS", 1)
+    monkeypatch.setattr(app_module, "PROFILE_INTERVAL_MS", 1)
+    monkeypatch.setattr(app_module, "PROFILE_MAX_FILES", 2)
+
+    pdf = blank_pdf(300)
+    for _ in range(4):
+        split(pdf, 300).close()
+
+    profiles = events(capsys.readouterr().out, "request_profile")
+    assert len(profiles) == 4
+    assert len(list(profile_dir.glob("*.folded"))) == 2
@@ -0,0 +1,136 @@
+import io
+import json
+
+import pytest
+from PyPDF2 import PdfReader
+
+import app as app_module
+
+
+def build_pdf(num_pages=3, pages_rotate=None, trailing_eol=True):
+    """Hand-build a classic-xref PDF, optionally with /Rotate on /Pages."""
+    # 1 = catalog, 2 = pages, 3.. = page objects
+    kids = " ".join(f"{3 + i} 0 R" for i in range(num_pages))
+    rotate = f" /Rotate {pages_rotate}" if pages_rotate is not None else ""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [ {kids} ] /Count {num_pages}"
+        f" /MediaBox [ 0 0 612 792 ]{rotate} >>",
+    ] + ["<< /Type /Page /Parent 2 0 R >>"] * num_pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{n} 0 obj\n{obj}\nendobj\n".encode("ascii"))
+    xref_pos = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f\r\n".encode("ascii"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n\r\n".encode("ascii"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+              f"startxref\n{xref_pos}\n%%EOF".encode("ascii"))
+    if trailing_eol:
+        out.write(b"\n")
+    return out.getvalue()
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def rotate(client, pdf_bytes, **form):
+    response = client.post("/rotate", data={"file": (io.BytesIO(pdf_bytes), "in.pdf"), **form})
+    assert response.status_code == 200, response.get_json()
+    data = response.data
+    response.close()
+    return data
+
+
+def rotations(pdf_bytes):
+    reader = PdfReader(io.BytesIO(pdf_bytes), strict=True)
+    return [page.get("/Rotate", 0) for page in reader.pages]
+
+
+def test_incremental_without_trailing_eol(client):
+    original = build_pdf(trailing_eol=False)
+    output = rotate(client, original, angle="90", pages="1")
+
+    assert output.startswith(original)
+    assert rotations(output) == [90, 0, 0]
+
+
+def test_incremental_with_inherited_rotate(client):
+    original = build_pdf(pages_rotate=90)
+    output = rotate(client, original, angle="90", pages="2")
+
+    assert output.startswith(original)
+    assert rotations(output) == [90, 180, 90]
+
+
+def test_incremental_chained_updates(client):
+    original = build_pdf()
+    once = rotate(client, original, angle="90", pages="1-2")
+    twice = rotate(client, once, angle="180", pages="2-3")
+
+    assert twice.startswith(once)
+    assert rotations(twice) == [90, 270, 180]
+
+
+def test_incremental_angle_map(client):
+    original = build_pdf()
+    output = rotate(client, original, angles=json.dumps({"1": 90, "3": 270}))
+
+    assert output.startswith(original)
+    assert rotations(output) == [90, 0, 270]
+
+
+def test_full_mode_matches_incremental(client):
+    original = build_pdf(pages_rotate=180)
+    output = rotate(client, original, mode="full", angles=json.dumps({"2": 90}))
+
+    assert not output.startswith(original)
+    assert rotations(output) == [180, 270, 180]
+
+
+def rotate_event(captured):
+    events = [json.loads(line) for line in captured.splitlines() if line.startswith("{")]
+    return [e for e in events if e["event"] == "rotate"][0]
+
+
+def test_log_keeps_single_angle_field(client, capsys):
+    rotate(client, build_pdf(), angle="180", pages="2")
+
+    event = rotate_event(capsys.readouterr().out)
+    assert event["angle"] == 180
+    assert event["angles"] == [180]
+
+
+def test_log_angle_is_null_for_angle_map(client, capsys):
+    rotate(client, build_pdf(), angles=json.dumps({"1": 90, "2": 270}))
+
+    event = rotate_event(capsys.readouterr().out)
+    assert event["angle"] is None
+    assert event["angles"] == [90, 270]
+
+
+def test_angle_map_skips_zero_and_normalises(client):
+    original = build_pdf()
+    output = rotate(client, original, angles=json.dumps({"1": 0, "2": -90, "3": 450}))
+
+    assert rotations(output) == [0, 270, 90]
+
+
+def test_angle_map_rejects_non_multiple_of_90(client):
+    response = client.post("/rotate", data={
+        "file": (io.BytesIO(build_pdf()), "in.pdf"),
+        "angles": json.dumps({"1": 45}),
+    })
+    assert response.status_code == 400
+
+
+def test_angle_map_all_zero_leaves_pages_unchanged(client):
+    output = rotate(client, build_pdf(), angles=json.dumps({"1": 0, "2": 360}))
+
+    assert rotations(output) == [0, 0, 0]
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys
+import app
+heavy = {name: name in sys.modules for name in app.HEAVY_MODULES}
+health = app.app.test_client().get("/healthz").get_json()
+print(json.dumps({"probe": True, "heavy": heavy, "health": health}))
+"""
+
+
+def boot(tmp_path, **env):
+    """Import app in a fresh interpreter; return (startup event, probe)."""
+    # A no-op `gs` lets warm-up succeed without Ghostscript installed.
+    fake_gs = tmp_path / "gs"
+    fake_gs.write_text("#!/bin/sh\nexit 0\n")
+    fake_gs.chmod(0o755)
+
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env={**os.environ,
+             "PATH": f"{tmp_path}{os.pathsep}{os.environ['PATH']}",
+             **env},
+        capture_output=True, text=True, check=True,
+    )
+    lines = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    startup = [line for line in lines if line.get("event") == "startup"]
+    probe = [line for line in lines if line.get("probe")][0]
+    assert len(startup) == 1
+    return startup[0], probe
+
+
+def test_lazy_imports_defer_heavy_modules(tmp_path):
+    startup, probe = boot(tmp_path, LAZY_IMPORTS="1", WARMUP="0")
+
+    assert probe["heavy"] == {"PyPDF2": False, "PIL.Image": False}
+    assert "import_flask" in startup["timings_ms"]
+    assert probe["health"]["warmed_up"] is False
+
+
+def test_eager_imports_load_heavy_modules(tmp_path):
+    startup, probe = boot(tmp_path, LAZY_IMPORTS="0", WARMUP="0")
+
+    assert probe["heavy"] == {"PyPDF2": True, "PIL.Image": True}
+    assert "import_PyPDF2" in startup["timings_ms"]
+
+
+def test_warmup_reports_ready(tmp_path):
+    startup, probe = boot(tmp_path, WARMUP="1")
+
+    assert startup["status"] == "success"
+    assert startup["warmed_up"] is True
+    for step in ("warmup_gs_pdfwrite", "warmup_gs_jpeg", "warmup_gs_jpeggray",
+                 "warmup_gs_png16m", "warmup_gs_pnggray", "warmup_pil_webp"):
+        assert step in startup["timings_ms"]
+    assert probe["health"]["warmed_up"] is True
+
+
+def test_failed_warmup_is_a_single_error_event(tmp_path):
+    startup, probe = boot(tmp_path, WARMUP="1", PATH="/nonexistent")
+
+    assert startup["status"] == "error"
+    assert startup["error"].startswith("Warm-up failed")
+    assert probe["health"]["warmed_up"] is False